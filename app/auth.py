@@ -2,14 +2,19 @@
 Authentication ve Authorization modülü
 """
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+from cachetools import TLRUCache, cached
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+import bcrypt
+import functools
+import hashlib
+import hmac
 import secrets
-import string
+import threading
+import time
 from .settings import settings
 
 # JWT ayarları
@@ -17,8 +22,16 @@ SECRET_KEY = settings.SECRET_KEY if hasattr(settings, 'SECRET_KEY') else secrets
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Şifre hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Çözülmüş token cache'i: aynı token için HMAC + JSON parse işi tekrar yapılmaz.
+# Girdiler en fazla TOKEN_CACHE_TTL saniye, her durumda token'ın `exp` anına kadar tutulur.
+TOKEN_CACHE_TTL = 60
+TOKEN_CACHE_MAXSIZE = 4096
+
+# Şifre hashing (bcrypt C eklentisi doğrudan kullanılır).
+# Cost: settings.BCRYPT_ROUNDS, verilmemişse test ortamında 4, diğerlerinde 12
+BCRYPT_ROUNDS = settings.BCRYPT_ROUNDS or (4 if settings.ENV == "test" else 12)
+# passlib ile üretilmiş eski hash'ler de aynı modular crypt formatındadır
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
 
 # HTTP Bearer token
 security = HTTPBearer()
@@ -31,8 +44,10 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     username: Optional[str] = None
 
-# Kullanıcı modeli
+# Kullanıcı modeli (frozen: cache'lenen örnekler istekler arasında paylaşılır)
 class User(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     username: str
     email: Optional[str] = None
     is_active: bool = True
@@ -41,47 +56,109 @@ class User(BaseModel):
 class UserInDB(User):
     hashed_password: str
 
-# Demo kullanıcı veritabanı (gerçek uygulamada veritabanı kullanılacak)
-fake_users_db: Dict[str, UserInDB] = {
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Şifre doğrulama"""
+    if not hashed_password.startswith(_BCRYPT_PREFIXES):
+        return False
+    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+
+def get_password_hash(password: str) -> str:
+    """Şifre hashleme"""
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+
+def _hash_rounds(hashed_password: str) -> int:
+    """bcrypt hash'inin cost değeri ($2b$NN$...)"""
+    return int(hashed_password[4:6])
+
+@functools.lru_cache(maxsize=1)
+def _dummy_hash() -> bytes:
+    """Bilinmeyen kullanıcılar için karşılaştırma hash'i (ilk ihtiyaçta üretilir)
+
+    Cost saklı kullanıcı hash'lerinden alınır: BCRYPT_ROUNDS'tan farklı olursa
+    yanıt süresi kullanıcı adının var olup olmadığını sızdırır. Sonradan farklı
+    cost'la eklenen kayıtlar varsa en yükseği kullanılır.
+    """
+    rounds = max(_hash_rounds(user["hashed_password"]) for user in fake_users_db.values())
+    return bcrypt.hashpw(b"x", bcrypt.gensalt(rounds=rounds))
+
+# Demo kullanıcı veritabanı (gerçek uygulamada veritabanı kullanılacak).
+# Hash'ler önceden üretilmiş sabitlerdir (bcrypt cost 4, sadece demo/test
+# fixture'ı); import sırasında KDF çalışmaz. Şifreler: admin123 / user123
+fake_users_db: Dict[str, Dict[str, Any]] = {
     "admin": {
         "username": "admin",
         "email": "admin@example.com",
-        "hashed_password": pwd_context.hash("admin123"),
+        "hashed_password": "$2b$04$NAWg68jCUkTyNmPwdaKHYeFQclTVjs186M9AF7jOvNd2Tubih5LS6",
         "is_active": True,
         "is_admin": True,
     },
     "user": {
-        "username": "user", 
+        "username": "user",
         "email": "user@example.com",
-        "hashed_password": pwd_context.hash("user123"),
+        "hashed_password": "$2b$04$VJLpPits5j3AoRufhFiBkOctxLbYQuoyxCrbcTv0pFBiDv2nP5Ot.",
         "is_active": True,
         "is_admin": False,
     }
 }
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Şifre doğrulama"""
-    return pwd_context.verify(plain_password, hashed_password)
+# Demo kayıtları tek cost'ta olmalı: bilinmeyen kullanıcı yolu (_dummy_hash) ile
+# gerçek kullanıcı doğrulaması aynı sürede çalışsın
+_fixture_rounds = {_hash_rounds(user["hashed_password"]) for user in fake_users_db.values()}
+if len(_fixture_rounds) != 1:
+    raise RuntimeError(f"fake_users_db hashes must share one bcrypt cost, got {sorted(_fixture_rounds)}")
+del _fixture_rounds
 
-def get_password_hash(password: str) -> str:
-    """Şifre hashleme"""
-    return pwd_context.hash(password)
+# Kullanıcı model cache'i: username -> (UserInDB, User)
+_USER_CACHE: Dict[str, Tuple[UserInDB, User]] = {}
+
+# fake_users_db kayıtlarında bulunması gereken alanlar (şema kayması kontrolü)
+_REQUIRED_FIELDS = frozenset(name for name, field in UserInDB.model_fields.items() if field.is_required())
+
+def _get_user_models(username: str) -> Optional[Tuple[UserInDB, User]]:
+    """Kullanıcı modellerini al; her kullanıcı için bir kez oluşturulur"""
+    entry = _USER_CACHE.get(username)
+    if entry is None:
+        user_dict = fake_users_db.get(username)
+        if not user_dict:
+            return None
+        # Kayıtlar süreç içi ve güvenilir: validasyon atlanır
+        assert _REQUIRED_FIELDS <= user_dict.keys(), f"user record missing {_REQUIRED_FIELDS - user_dict.keys()}"
+        user_in_db = UserInDB.model_construct(**user_dict)
+        user = User.model_construct(username=user_in_db.username, email=user_in_db.email,
+                                    is_active=user_in_db.is_active, is_admin=user_in_db.is_admin)
+        entry = _USER_CACHE[username] = (user_in_db, user)
+    return entry
+
+def invalidate_user_cache(username: Optional[str] = None) -> None:
+    """fake_users_db değiştiğinde model cache'ini ve dummy hash'i temizle"""
+    if username is None:
+        _USER_CACHE.clear()
+    else:
+        _USER_CACHE.pop(username, None)
+    # Yeni kayıtların cost'u farklı olabilir
+    _dummy_hash.cache_clear()
 
 def get_user(username: str) -> Optional[UserInDB]:
     """Kullanıcı bilgilerini al"""
-    user_dict = fake_users_db.get(username)
-    if user_dict:
-        return UserInDB(**user_dict)
+    entry = _get_user_models(username)
+    if entry:
+        return entry[0]
     return None
 
 def authenticate_user(username: str, password: str) -> Optional[User]:
     """Kullanıcı kimlik doğrulama"""
-    user = get_user(username)
-    if not user:
+    entry = _get_user_models(username)
+    if not entry:
+        # Kullanıcı yoksa da bir bcrypt doğrulaması yap: yanıt süresi
+        # kullanıcı adının var olup olmadığını sızdırmasın
+        bcrypt.checkpw(password.encode(), _dummy_hash())
+        return None
+    user_in_db, user = entry
+    if not verify_password(password, user_in_db.hashed_password):
         return None
-    if not verify_password(password, user.hashed_password):
+    if not hmac.compare_digest(user_in_db.username.encode(), username.encode()):
         return None
-    return User(username=user.username, email=user.email, is_active=user.is_active, is_admin=user.is_admin)
+    return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """JWT token oluşturma"""
@@ -94,6 +171,21 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _token_ttu(_key: bytes, payload: Dict[str, Any], now: float) -> float:
+    """Cache girdisinin son kullanma zamanı (token exp'ini geçemez)"""
+    return min(now + TOKEN_CACHE_TTL, payload.get("exp", now))
+
+def _token_cache_key(token: str) -> bytes:
+    """Ham token'ı bellekte tutmamak için sabit uzunlukta özet"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+_token_cache: TLRUCache = TLRUCache(maxsize=TOKEN_CACHE_MAXSIZE, ttu=_token_ttu, timer=time.time)
+
+@cached(cache=_token_cache, key=_token_cache_key, lock=threading.RLock())
+def _decode_cached(token: str) -> Dict[str, Any]:
+    """JWT çözme (TTL cache'li); geçersiz token'lar cache'lenmez"""
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> TokenData:
     """Token doğrulama"""
     credentials_exception = HTTPException(
@@ -102,7 +194,7 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode_cached(credentials.credentials)
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
@@ -113,16 +205,17 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
 
 def get_current_user(token_data: TokenData = Depends(verify_token)) -> User:
     """Mevcut kullanıcıyı al"""
-    user = get_user(token_data.username)
-    if user is None:
+    entry = _get_user_models(token_data.username)
+    if entry is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    user = entry[1]
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return User(username=user.username, email=user.email, is_active=user.is_active, is_admin=user.is_admin)
+    return user
 
 def require_admin(current_user: User = Depends(get_current_user)) -> User:
     """Admin yetkisi gerektiren endpoint'ler için"""
@@ -135,9 +228,30 @@ def require_admin(current_user: User = Depends(get_current_user)) -> User:
 
 # Rate limiting için yardımcı fonksiyonlar
 def generate_api_key() -> str:
-    """API key oluşturma"""
-    alphabet = string.ascii_letters + string.digits
-    return ''.join(secrets.choice(alphabet) for _ in range(32))
+    """API key oluşturma (24 rastgele bayt -> 32 karakter URL-safe)"""
+    return secrets.token_urlsafe(24)
+
+# API key storage (gerçek uygulamada veritabanı kullanılacak).
+# Anahtarın kendisi değil, sabit uzunluktaki blake2b özeti saklanır.
+api_keys: Dict[bytes, Dict[str, Any]] = {}
+
+def _api_key_digest(key: str) -> bytes:
+    """API key özeti"""
+    return hashlib.blake2b(key.encode(), digest_size=32).digest()
+
+def store_api_key(key: str, info: Dict[str, Any]) -> None:
+    """API key kaydet"""
+    api_keys[_api_key_digest(key)] = info
 
-# API key storage (gerçek uygulamada veritabanı kullanılacak)
-api_keys: Dict[str, Dict[str, Any]] = {}
+def check_api_key(presented: str) -> Optional[Dict[str, Any]]:
+    """API key doğrulama (sabit zamanlı karşılaştırma)"""
+    digest = _api_key_digest(presented)
+    found = 0
+    match: Optional[Dict[str, Any]] = None
+    # Eşleşme bulunsa da tüm kayıtlar karşılaştırılır; süre hangi anahtarın eşleştiğine bağlı değil
+    for stored, info in api_keys.items():
+        is_match = hmac.compare_digest(digest, stored)
+        found |= is_match
+        if is_match:
+            match = info
+    return match if found else None
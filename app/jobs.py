@@ -0,0 +1,173 @@
+"""
+Job index: kullanıcı bazlı recent job sorted set'leri ve job özetleri
+
+/jobs listesi RQ job hash'lerini tek tek okumak yerine bu index'ten
+(ZREVRANGE + MGET) okunur. Özetler enqueue sırasında API tarafından,
+durum değişikliklerinde worker tarafından yazılır.
+
+Durum değişiklikleri ayrıca job'un status kanalına publish edilir;
+SSE stream'leri job'u poll etmek yerine bu kanalı dinler (süreç başına tek
+PubSub bağlantısı: JobStatusHub).
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+import orjson
+from rq.job import Job
+
+# Her index'te tutulan en fazla job sayısı
+RECENT_JOBS_LIMIT = 200
+# Job özetlerinin yaşam süresi (saniye)
+SUMMARY_TTL = 86400
+
+# Admin görünümü için tüm joblar
+ALL_JOBS_KEY = "jobs:recent:all"
+
+
+def user_jobs_key(username: str) -> str:
+    """Kullanıcının recent job sorted set'i"""
+    return f"jobs:recent:user:{username}"
+
+
+def summary_key(job_id: str) -> str:
+    """Job özet kaydı"""
+    return f"jobs:summary:{job_id}"
+
+
+def status_channel(job_id: str) -> str:
+    """Job durum değişikliklerinin publish edildiği pub/sub kanalı"""
+    return f"job:{job_id}:status"
+
+
+def format_ts(value: Optional[datetime]) -> Optional[str]:
+    """RQ job zaman damgasını ISO 8601 string'e çevir"""
+    return value.isoformat() if value else None
+
+
+def job_summary(job: Job, user: Optional[str] = None) -> Dict[str, Any]:
+    """/jobs listesinde dönen job özeti"""
+    if user is None:
+        user = (job.meta or {}).get("user", "unknown")
+    return {
+        "job_id": job.id,
+        "status": job.get_status(refresh=False),
+        "enqueued_at": format_ts(job.enqueued_at),
+        "started_at": format_ts(job.started_at),
+        "ended_at": format_ts(job.ended_at),
+        "user": user,
+    }
+
+
+def index_job(pipe, job: Job, user: str) -> None:
+    """Job'u recent index'lerine ve özet kaydına ekle (pipeline'a yazar)"""
+    score = time.time()
+    for key in (ALL_JOBS_KEY, user_jobs_key(user)):
+        pipe.zadd(key, {job.id: score})
+        pipe.zremrangebyrank(key, 0, -(RECENT_JOBS_LIMIT + 1))
+    pipe.set(summary_key(job.id), orjson.dumps(job_summary(job, user)), ex=SUMMARY_TTL)
+
+
+def summary_ttl(connection, job: Job) -> int:
+    """Özetin yaşam süresi: RQ job hash'inden uzun yaşamaz (en fazla SUMMARY_TTL)"""
+    ttl = connection.ttl(job.key)
+    if ttl == -2:
+        # Hash silinmiş (ör. result_ttl=0)
+        return 0
+    if ttl == -1:
+        # Hash süresiz tutuluyor
+        return SUMMARY_TTL
+    return min(ttl, SUMMARY_TTL)
+
+
+def update_summary(connection, job: Job, ttl: int = SUMMARY_TTL) -> None:
+    """Job durumu değiştiğinde özet kaydını güncelle (ttl 0: job hash'i yok, özet silinir)"""
+    if ttl > 0:
+        connection.set(summary_key(job.id), orjson.dumps(job_summary(job)), ex=ttl)
+    else:
+        connection.delete(summary_key(job.id))
+
+
+def publish_status(connection, job: Job) -> None:
+    """Job'un güncel durumunu status kanalına publish et"""
+    connection.publish(status_channel(job.id), job.get_status(refresh=False))
+
+
+def record_status_change(connection, job: Job, ttl: int = SUMMARY_TTL) -> None:
+    """Durum değişikliği: özeti güncelle ve dinleyicilere bildir (tek RTT)"""
+    pipe = connection.pipeline(transaction=False)
+    update_summary(pipe, job, ttl)
+    publish_status(pipe, job)
+    pipe.execute()
+
+
+class JobStatusHub:
+    """Süreç başına tek PubSub bağlantısı; durum mesajlarını kanal bazında stream kuyruklarına dağıtır
+
+    Böylece açık SSE stream sayısı Redis bağlantı havuzunu tüketmez.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._pubsub = None
+        self._listeners: Dict[str, Set[asyncio.Queue]] = {}
+        self._lock = asyncio.Lock()
+        self._reader: Optional[asyncio.Task] = None
+
+    async def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Job'un durum mesajları için kuyruk döndür (kanala ilk dinleyicide abone olunur)"""
+        channel = status_channel(job_id)
+        updates: asyncio.Queue = asyncio.Queue()
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = self._connection.pubsub(ignore_subscribe_messages=True)
+            listeners = self._listeners.get(channel)
+            if listeners is None:
+                listeners = self._listeners[channel] = set()
+                await self._pubsub.subscribe(channel)
+            listeners.add(updates)
+            if self._reader is None:
+                self._reader = asyncio.create_task(self._read())
+        return updates
+
+    async def unsubscribe(self, job_id: str, updates: asyncio.Queue) -> None:
+        """Kuyruğu bırak (kanalın son dinleyicisiyse abonelikten çıkılır)"""
+        channel = status_channel(job_id)
+        async with self._lock:
+            listeners = self._listeners.get(channel)
+            if listeners is None:
+                return
+            listeners.discard(updates)
+            if not listeners:
+                del self._listeners[channel]
+                await self._pubsub.unsubscribe(channel)
+
+    async def _read(self) -> None:
+        """PubSub mesajlarını dinleyici kuyruklarına dağıt"""
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Bağlantı koptu: PubSub bir sonraki okumada yeniden bağlanıp abonelikleri yeniler
+                logging.getLogger(__name__).warning("job status pubsub read failed", exc_info=True)
+                await asyncio.sleep(1)
+                continue
+            if message is None:
+                continue
+            status = message["data"].decode()
+            for updates in self._listeners.get(message["channel"].decode(), ()):
+                updates.put_nowait(status)
+
+    async def aclose(self) -> None:
+        """Okuyucu task'ı durdur ve PubSub bağlantısını kapat"""
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        self._listeners.clear()
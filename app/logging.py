@@ -1,63 +1,132 @@
 """
 Structured logging ve monitoring sistemi
 """
+import asyncio
+import atexit
+import functools
+import orjson
+import queue
 import structlog
 import logging
+import logging.handlers
 import sys
-from datetime import datetime
-from typing import Any, Dict
+import threading
+import types
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
 from fastapi import Request
 import time
 import json
-from .settings import settings
+from .settings import get_async_redis_pool, settings
+
+# Arka planda stdout'a yazan listener (setup_logging tarafından başlatılır)
+_log_listener: logging.handlers.QueueListener | None = None
+
+def _iso_now() -> str:
+    """UTC zaman damgası (ISO 8601, milisaniye hassasiyeti)"""
+    return datetime.fromtimestamp(time.time(), tz=timezone.utc).isoformat(timespec="milliseconds")
+
+def _orjson_dumps(event_dict: Dict[str, Any], **kwargs) -> str:
+    """orjson ile JSON render (stdlib handler'ları str bekler)"""
+    return orjson.dumps(event_dict, **kwargs).decode()
+
+_json_renderer = structlog.processors.JSONRenderer(serializer=_orjson_dumps)
+
+# Varsayılan (hafif) processor zinciri: normal akışta exc_info/stack_info yok
+# Seviye filtresi wrapper_class'ta yapılır (make_filtering_bound_logger)
+_default_processors = [
+    structlog.stdlib.add_log_level,
+    structlog.processors.TimeStamper(fmt="iso"),
+    _json_renderer,
+]
+
+# Hata logger'ı zinciri: stack ve exception bilgisini de render eder
+_error_processors = [
+    structlog.stdlib.add_logger_name,
+    structlog.stdlib.add_log_level,
+    structlog.processors.TimeStamper(fmt="iso"),
+    structlog.processors.StackInfoRenderer(),
+    structlog.processors.format_exc_info,
+    _json_renderer,
+]
 
 # Logging configuration
 def setup_logging():
     """Logging sistemi kurulumu"""
     structlog.configure(
-        processors=[
-            structlog.stdlib.filter_by_level,
-            structlog.stdlib.add_logger_name,
-            structlog.stdlib.add_log_level,
-            structlog.stdlib.PositionalArgumentsFormatter(),
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.processors.StackInfoRenderer(),
-            structlog.processors.format_exc_info,
-            structlog.processors.JSONRenderer()
-        ],
+        processors=_default_processors,
         context_class=dict,
         logger_factory=structlog.stdlib.LoggerFactory(),
-        wrapper_class=structlog.stdlib.BoundLogger,
+        # Eşiğin altındaki çağrılar event dict bile oluşturmadan no-op döner
+        wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
         cache_logger_on_first_use=True,
     )
     
-    # Console handler
+    global _log_listener
+    if _log_listener is not None:
+        return
+    
+    # Console handler (mesaj zaten JSON olarak render edildi)
     handler = logging.StreamHandler(sys.stdout)
-    formatter = structlog.dev.ConsoleRenderer()
-    handler.setFormatter(formatter)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    
+    # Yazma işi listener thread'inde yapılır; request thread'i sadece kuyruğa ekler
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _log_listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
     
     # Get root logger
     root_logger = logging.getLogger()
-    root_logger.addHandler(handler)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
     root_logger.setLevel(logging.INFO)
+    
+    # cpu_percent(interval=None) ilk çağrıda anlamsız 0.0 döner; ölçüm penceresini başlat
+    import psutil
+    psutil.cpu_percent(interval=None)
 
 # Logger instance
 logger = structlog.get_logger()
+error_logger = structlog.wrap_logger(None, processors=_error_processors, logger_factory_args=("errors",))
+
+class _LazyLogValue:
+    """Log event'i render edilene kadar hesaplanmayan değer
+    
+    JSONRenderer bilinmeyen nesneler için `__structlog__` çağırır; seviye
+    filtresine takılan event'lerde hesaplama hiç yapılmaz. Sonuç ilk
+    render'da saklanır (aynı request bilgisi birden çok event'te kullanılır).
+    """
+    __slots__ = ("_func", "_value")
+    _UNSET = object()
+    
+    def __init__(self, func):
+        self._func = func
+        self._value = self._UNSET
+    
+    def __structlog__(self):
+        if self._value is self._UNSET:
+            self._value = self._func()
+        return self._value
+    
+    def __repr__(self) -> str:
+        return repr(self.__structlog__())
 
 class LogContext:
     """Request context için logging helper"""
+    __slots__ = ("request", "start_time")
+    
     def __init__(self, request: Request):
         self.request = request
         self.start_time = time.time()
         
     def get_request_info(self) -> Dict[str, Any]:
-        """Request bilgilerini topla"""
+        """Request bilgilerini topla (URL ve user-agent render anında hesaplanır)"""
+        request = self.request
         return {
-            "method": self.request.method,
-            "url": str(self.request.url),
-            "client_ip": self.request.client.host if self.request.client else None,
-            "user_agent": self.request.headers.get("user-agent"),
-            "timestamp": datetime.utcnow().isoformat(),
+            "method": request.method,
+            "url": _LazyLogValue(lambda: str(request.url)),
+            "client_ip": request.client.host if request.client else None,
+            "user_agent": _LazyLogValue(lambda: request.headers.get("user-agent")),
         }
 
 class PerformanceLogger:
@@ -87,7 +156,7 @@ class PerformanceLogger:
     @staticmethod
     def log_job_error(job_id: str, error: str, **kwargs):
         """Job hata log'u"""
-        logger.error(
+        error_logger.error(
             "job_failed",
             job_id=job_id,
             error=error,
@@ -104,26 +173,74 @@ class PerformanceLogger:
             status_code=status_code
         )
 
+# Health check client'ları (ilk kullanımda oluşturulur, sonraki check'lerde tekrar kullanılır)
+_redis_client = None
+_qdrant_client = None
+
+# Redis health ping'i için üst süre (saniye); client ortak havuzu kullandığından
+# socket timeout yerine ping asyncio.wait_for ile sınırlanır
+REDIS_HEALTH_TIMEOUT = 1.0
+
+def _get_redis_client():
+    global _redis_client
+    if _redis_client is None:
+        from redis.asyncio import Redis
+        _redis_client = Redis(connection_pool=get_async_redis_pool())
+    return _redis_client
+
+def _get_qdrant_client():
+    global _qdrant_client
+    if _qdrant_client is None:
+        import httpx
+        _qdrant_client = httpx.AsyncClient(base_url=settings.QDRANT_URL, timeout=1.0)
+    return _qdrant_client
+
+async def aclose_health_clients() -> None:
+    """Health check client'larını kapat (shutdown'da çağrılır)"""
+    global _redis_client, _qdrant_client
+    if _redis_client is not None:
+        # Ortak havuzun kendisi sahibi tarafından (main shutdown) kapatılır
+        await _redis_client.aclose()
+        _redis_client = None
+    if _qdrant_client is not None:
+        await _qdrant_client.aclose()
+        _qdrant_client = None
+
+def _async_ttl_cache(ttl: float):
+    """Argümansız async fonksiyonun sonucunu `ttl` saniye cache'ler"""
+    def decorator(func):
+        cached: list = []  # [(expires_at, value)]
+        
+        @functools.wraps(func)
+        async def wrapper():
+            now = time.monotonic()
+            if cached and cached[0][0] > now:
+                return cached[0][1]
+            value = await func()
+            cached[:] = [(now + ttl, value)]
+            return value
+        return wrapper
+    return decorator
+
 class HealthChecker:
     """Health check sistemi"""
     
     @staticmethod
-    def check_redis() -> Dict[str, Any]:
-        """Redis health check"""
+    @_async_ttl_cache(ttl=5)
+    async def check_redis() -> Dict[str, Any]:
+        """Redis health check (sonuç 5 sn cache'lenir)"""
         try:
-            from redis import Redis
-            r = Redis.from_url(settings.REDIS_URL)
-            r.ping()
+            await asyncio.wait_for(_get_redis_client().ping(), REDIS_HEALTH_TIMEOUT)
             return {"status": "healthy", "service": "redis"}
         except Exception as e:
             return {"status": "unhealthy", "service": "redis", "error": str(e)}
     
     @staticmethod
-    def check_qdrant() -> Dict[str, Any]:
-        """Qdrant health check"""
+    @_async_ttl_cache(ttl=5)
+    async def check_qdrant() -> Dict[str, Any]:
+        """Qdrant health check (sonuç 5 sn cache'lenir)"""
         try:
-            import httpx
-            response = httpx.get(f"{settings.QDRANT_URL}/health")
+            response = await _get_qdrant_client().get("/health")
             return {
                 "status": "healthy" if response.status_code == 200 else "unhealthy",
                 "service": "qdrant",
@@ -133,80 +250,133 @@ class HealthChecker:
             return {"status": "unhealthy", "service": "qdrant", "error": str(e)}
     
     @staticmethod
-    def check_system() -> Dict[str, Any]:
+    def check_system(timestamp: Optional[str] = None) -> Dict[str, Any]:
         """Sistem durumu check"""
         import psutil
         return {
-            "cpu_percent": psutil.cpu_percent(interval=1),
+            # interval=None: son çağrıdan bu yana ölçülen değer, bekleme yok
+            "cpu_percent": psutil.cpu_percent(interval=None),
             "memory_percent": psutil.virtual_memory().percent,
             "disk_percent": psutil.disk_usage('/').percent,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": timestamp or _iso_now()
         }
     
     @classmethod
-    def get_full_health_status(cls) -> Dict[str, Any]:
-        """Tam health status"""
+    async def get_full_health_status(cls) -> Dict[str, Any]:
+        """Tam health status (check'ler eşzamanlı çalışır)"""
+        timestamp = _iso_now()
+        redis_status, qdrant_status, system_status = await asyncio.gather(
+            cls.check_redis(),
+            cls.check_qdrant(),
+            asyncio.to_thread(cls.check_system, timestamp),
+        )
         return {
-            "timestamp": datetime.utcnow().isoformat(),
-            "redis": cls.check_redis(),
-            "qdrant": cls.check_qdrant(),
-            "system": cls.check_system(),
+            "timestamp": timestamp,
+            "redis": redis_status,
+            "qdrant": qdrant_status,
+            "system": system_status,
             "overall": "healthy"  # Tüm servisler healthy ise
         }
 
 # Metrics collector
+_JOB_COUNTERS = ("total_jobs", "completed_jobs", "failed_jobs")
+_API_COUNTERS = ("total_requests", "successful_requests", "failed_requests")
+_JOB_COUNTER_NAMES = frozenset(_JOB_COUNTERS)
+_API_COUNTER_NAMES = frozenset(_API_COUNTERS)
+# Her thread'in kendi shard'ında tutulan alanlar ("writes": shard'daki güncelleme sayısı)
+_SHARD_FIELDS = _JOB_COUNTERS + _API_COUNTERS + ("job_duration_sum", "api_response_time_sum")
+_SHARD_KEYS = _SHARD_FIELDS + ("writes",)
+
 class MetricsCollector:
-    """Sistem metrikleri toplayıcı"""
+    """Sistem metrikleri toplayıcı
+    
+    Her thread kendi sayaç shard'ını günceller (global kilit yok);
+    get_metrics shard'ları okuma anında toplar. Arada yazma olmadıysa
+    önceki snapshot tekrar kullanılır; "jobs"/"api" salt okunur mapping'dir.
+    """
     
     def __init__(self):
-        self.job_metrics = {
-            "total_jobs": 0,
-            "completed_jobs": 0,
-            "failed_jobs": 0,
-            "average_duration": 0.0
-        }
-        self.api_metrics = {
-            "total_requests": 0,
-            "successful_requests": 0,
-            "failed_requests": 0,
-            "average_response_time": 0.0
-        }
+        self._local = threading.local()
+        # Thread'ler bitse de sayaçları kaybolmasın diye shard'lar güçlü referansla tutulur
+        self._shards: list[Dict[str, float]] = []
+        self._shards_lock = threading.Lock()
+        # (version, jobs, api): son get_metrics snapshot'ı
+        self._snapshot: tuple[int, types.MappingProxyType, types.MappingProxyType] | None = None
     
-    def increment_job_metric(self, metric: str):
+    def _shard(self) -> Dict[str, float]:
+        """Çağıran thread'in sayaç shard'ı"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            # Anahtarlar sabit: toplama sırasında dict boyutu değişmez
+            shard = dict.fromkeys(_SHARD_KEYS, 0)
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+    
+    def increment_job_metric(self, metric: str, count: int = 1):
         """Job metriği artır"""
-        if metric in self.job_metrics and isinstance(self.job_metrics[metric], int):
-            self.job_metrics[metric] += 1
+        if metric in _JOB_COUNTER_NAMES:
+            shard = self._shard()
+            shard[metric] += count
+            shard["writes"] += 1
     
     def update_job_duration(self, duration: float):
         """Job süre güncelle"""
-        # Ortalama süre hesapla
-        total_jobs = self.job_metrics["completed_jobs"]
-        if total_jobs > 1:
-            current_avg = self.job_metrics["average_duration"]
-            self.job_metrics["average_duration"] = (current_avg * (total_jobs - 1) + duration) / total_jobs
-        else:
-            self.job_metrics["average_duration"] = duration
+        shard = self._shard()
+        shard["job_duration_sum"] += duration
+        shard["writes"] += 1
     
     def increment_api_metric(self, metric: str):
         """API metriği artır"""
-        if metric in self.api_metrics and isinstance(self.api_metrics[metric], int):
-            self.api_metrics[metric] += 1
+        if metric in _API_COUNTER_NAMES:
+            shard = self._shard()
+            shard[metric] += 1
+            shard["writes"] += 1
     
     def update_response_time(self, response_time: float):
         """API response süre güncelle"""
-        total_requests = self.api_metrics["total_requests"]
-        if total_requests > 1:
-            current_avg = self.api_metrics["average_response_time"]
-            self.api_metrics["average_response_time"] = (current_avg * (total_requests - 1) + response_time) / total_requests
-        else:
-            self.api_metrics["average_response_time"] = response_time
+        shard = self._shard()
+        shard["api_response_time_sum"] += response_time
+        shard["writes"] += 1
+    
+    def bulk_record(self, records: Iterable[tuple[int, float]]):
+        """API istek kayıtlarını (status_code, response_time) toplu olarak işle"""
+        total = successful = 0
+        response_time = 0.0
+        for status_code, process_time in records:
+            total += 1
+            response_time += process_time
+            if 200 <= status_code < 400:
+                successful += 1
+        if not total:
+            return
+        shard = self._shard()
+        shard["total_requests"] += total
+        shard["successful_requests"] += successful
+        shard["failed_requests"] += total - successful
+        shard["api_response_time_sum"] += response_time
+        shard["writes"] += 1
     
     def get_metrics(self) -> Dict[str, Any]:
-        """Tüm metrikleri döndür"""
+        """Tüm metrikleri döndür ("jobs" ve "api" salt okunur; değiştirmek için dict() ile kopyalayın)"""
+        with self._shards_lock:
+            shards = list(self._shards)
+        version = sum(shard["writes"] for shard in shards)
+        snapshot = self._snapshot
+        if snapshot is None or snapshot[0] != version:
+            totals = {field: sum(shard[field] for shard in shards) for field in _SHARD_FIELDS}
+            
+            jobs = {name: totals[name] for name in _JOB_COUNTERS}
+            jobs["average_duration"] = totals["job_duration_sum"] / max(jobs["completed_jobs"], 1)
+            api = {name: totals[name] for name in _API_COUNTERS}
+            api["average_response_time"] = totals["api_response_time_sum"] / max(api["total_requests"], 1)
+            snapshot = self._snapshot = (version, types.MappingProxyType(jobs), types.MappingProxyType(api))
         return {
-            "timestamp": datetime.utcnow().isoformat(),
-            "jobs": self.job_metrics.copy(),
-            "api": self.api_metrics.copy()
+            "timestamp": _iso_now(),
+            "jobs": snapshot[1],
+            "api": snapshot[2]
         }
 
 # Global metrics instance
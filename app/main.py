@@ -1,23 +1,27 @@
 from fastapi import FastAPI, HTTPException, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, HttpUrl, Field
 from rq import Queue
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
 from rq.job import Job
-from uuid import uuid4
+from uuid import UUID, uuid4
 import asyncio
-import json
+import orjson
+import logging
+import os
 from typing import AsyncGenerator
-from starlette.responses import StreamingResponse
-from datetime import datetime
+from sse_starlette.sse import EventSourceResponse
 import httpx
 import time
 
-from .settings import settings
+from .settings import get_async_redis_pool, get_redis_pool, settings
 from .pipeline import process_video_job
+from .jobs import ALL_JOBS_KEY, JobStatusHub, format_ts, index_job, record_status_change, summary_key, user_jobs_key
 from .auth import get_current_user, require_admin, authenticate_user, create_access_token, User, Token
 from .middleware import limiter, SecurityHeadersMiddleware, InputSanitizationMiddleware, get_cors_origins
-from .logging import setup_logging, logger, LogContext, PerformanceLogger, HealthChecker, metrics
+from .logging import setup_logging, logger, LogContext, PerformanceLogger, HealthChecker, aclose_health_clients, metrics, _iso_now
 
 # Logging sistemini başlat
 setup_logging()
@@ -26,7 +30,9 @@ setup_logging()
 app = FastAPI(
     title="Agent Ingest API - Enhanced",
     description="Güvenli ve güçlendirilmiş video ingest API sistemi",
-    version="2.0.0"
+    version="2.0.0",
+    # Tüm JSON yanıtları orjson ile encode edilir
+    default_response_class=ORJSONResponse,
 )
 
 # CORS ayarları
@@ -44,9 +50,11 @@ app.add_middleware(InputSanitizationMiddleware)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
-# Redis bağlantısı
-redis_conn = Redis.from_url(settings.REDIS_URL)
-queue = Queue(settings.RQ_QUEUE, connection=redis_conn)
+# Redis bağlantıları: handler'lardaki doğrudan komutlar async client ile,
+# RQ (sync kütüphane) işlemleri rq_conn ile ve asyncio.to_thread içinde yapılır
+redis_conn = AsyncRedis(connection_pool=get_async_redis_pool())
+rq_conn = Redis(connection_pool=get_redis_pool())
+queue = Queue(settings.RQ_QUEUE, connection=rq_conn)
 
 # Modeller
 class IngestRequest(BaseModel):
@@ -81,61 +89,89 @@ class HealthResponse(BaseModel):
     services: dict
 
 SETTINGS_KEY = "admin:settings"
+# Ayarlar nadiren değişir: süreç içinde kısa süre cache'lenir.
+# Diğer worker süreçleri değişikliği en geç SETTINGS_CACHE_TTL saniye sonra görür.
+SETTINGS_CACHE_TTL = 5.0
+_settings_cache: tuple[float, AdminSettings] | None = None
 
-def load_settings() -> AdminSettings:
-    raw = redis_conn.get(SETTINGS_KEY)
+async def _read_settings() -> AdminSettings:
+    raw = await redis_conn.get(SETTINGS_KEY)
     if not raw:
         return AdminSettings()
     try:
-        data = json.loads(raw)
-        return AdminSettings(**data)
+        return AdminSettings.model_validate_json(raw)
     except Exception:
         return AdminSettings()
 
-def save_settings(s: AdminSettings) -> None:
-    redis_conn.set(SETTINGS_KEY, json.dumps(s.model_dump()))
+async def load_settings() -> AdminSettings:
+    global _settings_cache
+    now = time.monotonic()
+    if _settings_cache and now - _settings_cache[0] < SETTINGS_CACHE_TTL:
+        return _settings_cache[1]
+    s = await _read_settings()
+    _settings_cache = (now, s)
+    return s
+
+async def save_settings(s: AdminSettings) -> None:
+    global _settings_cache
+    await redis_conn.set(SETTINGS_KEY, s.model_dump_json())
+    _settings_cache = (time.monotonic(), s)
 
 # Global start time for uptime calculation
 start_time = time.time()
 
+# API metrik kayıtları kuyruğu: middleware put_nowait yapar, _drain_metrics toplu işler
+METRICS_QUEUE_MAXSIZE = 10000
+METRICS_BATCH_SIZE = 256
+METRICS_FLUSH_INTERVAL = 0.05
+
+async def _drain_metrics(q: asyncio.Queue) -> None:
+    """Kuyruktaki metrik kayıtlarını toplayıp MetricsCollector'a yaz"""
+    while True:
+        batch = [await q.get()]
+        while len(batch) < METRICS_BATCH_SIZE:
+            try:
+                batch.append(q.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        metrics.bulk_record(batch)
+        await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     """Request timing ve logging middleware"""
-    start_time = time.time()
-    
-    # Request context oluştur
-    log_context = LogContext(request)
-    request_info = log_context.get_request_info()
+    # İstek zamanı bir kez alınır; handler'lar request.state.now_iso'yu kullanır
+    request.state.now_iso = _iso_now()
     
-    # Request'i logla
-    logger.info("Request started", **request_info)
+    # INFO kapalıysa request bilgisi hiç toplanmaz
+    log_enabled = logger.is_enabled_for(logging.INFO)
+    if log_enabled:
+        request_info = LogContext(request).get_request_info()
+        logger.info("Request started", **request_info)
     
-    process_time = time.time() - start_time
+    t0 = time.perf_counter()
     response = await call_next(request)
+    process_time = time.perf_counter() - t0
     
-    # Response time hesapla
-    process_time = time.time() - start_time
-    
-    # Response'u logla ve metrikleri güncelle
     status_code = response.status_code
-    PerformanceLogger.log_api_request(request_info, process_time, status_code)
+    if log_enabled:
+        PerformanceLogger.log_api_request(request_info, process_time, status_code)
     
-    # Metrikleri güncelle
-    metrics.increment_api_metric("total_requests")
-    metrics.update_response_time(process_time)
-    
-    if 200 <= status_code < 400:
-        metrics.increment_api_metric("successful_requests")
-    else:
-        metrics.increment_api_metric("failed_requests")
+    # Metrikler arka plan task'ı tarafından toplu işlenir; kuyruk doluysa doğrudan yazılır
+    record = (status_code, process_time)
+    try:
+        request.app.state.metrics_queue.put_nowait(record)
+    except asyncio.QueueFull:
+        metrics.bulk_record((record,))
     
     # Response header'a processing time ekle
     response.headers["X-Process-Time"] = str(process_time)
     
-    logger.info("Request completed", 
-               status_code=status_code, 
-               process_time=process_time,
-               **request_info)
+    if log_enabled:
+        logger.info("Request completed", 
+                   status_code=status_code, 
+                   process_time=process_time,
+                   **request_info)
     
     return response
 
@@ -147,7 +183,7 @@ async def health(request: Request):
     uptime = time.time() - start_time
     return HealthResponse(
         status="healthy",
-        timestamp=datetime.utcnow().isoformat(),
+        timestamp=request.state.now_iso,
         version="2.0.0",
         uptime=uptime,
         services={"api": "healthy"}
@@ -158,7 +194,7 @@ async def health(request: Request):
 @require_admin
 async def detailed_health(request: Request, current_user: User = Depends(get_current_user)):
     """Detaylı health check"""
-    health_status = HealthChecker.get_full_health_status()
+    health_status = await HealthChecker.get_full_health_status()
     return health_status
 
 @app.get("/metrics")
@@ -193,6 +229,15 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 # Video ingest endpoints
+def _enqueue_indexed(job_datas: list, user: str) -> list[Job]:
+    """Job'ları kuyruğa ekle ve recent index'e yaz (tek transaction, tek RTT; sync, thread'de çalışır)"""
+    with rq_conn.pipeline() as pipe:
+        jobs = queue.enqueue_many(job_datas, pipeline=pipe)
+        for job in jobs:
+            index_job(pipe, job, user)
+        pipe.execute()
+    return jobs
+
 @app.post("/ingest")
 @limiter.limit("5/minute")
 async def ingest(
@@ -216,26 +261,23 @@ async def ingest(
         "user": current_user.username,
         "priority": payload.priority,
         "callback_url": payload.callback_url,
-        "created_at": datetime.utcnow().isoformat()
+        "created_at": request.state.now_iso
     }
     
-    # Job'u kuyruğa ekle
-    job: Job = queue.enqueue(
-        process_video_job, 
-        str(payload.url), 
-        job_id=job_id, 
-        job_timeout="1h",
+    # Job'u kuyruğa ekle (job hash, kuyruk ve recent index tek MULTI/EXEC ile yazılır)
+    job_data = Queue.prepare_data(
+        process_video_job,
+        args=(str(payload.url),),
+        job_id=job_id,
+        timeout="1h",
         meta=job_meta
     )
+    job = (await asyncio.to_thread(_enqueue_indexed, [job_data], current_user.username))[0]
     
     # Metrikleri güncelle
     metrics.increment_job_metric("total_jobs")
     PerformanceLogger.log_job_start(job_id, "video_ingest", user=current_user.username)
     
-    # Recent jobs listesi güncelle
-    redis_conn.lpush("jobs:recent", job.id)
-    redis_conn.ltrim("jobs:recent", 0, 199)
-    
     logger.info("Job started", job_id=job_id, user=current_user.username, url=str(payload.url))
     
     return {
@@ -255,41 +297,65 @@ async def batch_ingest(
     if not payload.confirm_rights:
         raise HTTPException(status_code=400, detail="You must confirm rights for all videos")
     
-    job_ids = []
-    for url in payload.urls:
-        job_id = str(uuid4())
+    # Batch'in tüm joblarında aynı batch_id ve created_at kullanılır
+    batch_id = str(uuid4())
+    created_at = request.state.now_iso
+    # Job id'leri için rastgelelik tek os.urandom çağrısıyla alınır
+    rnd = os.urandom(16 * len(payload.urls))
+    
+    job_datas = []
+    for i, url in enumerate(payload.urls):
+        job_id = str(UUID(bytes=rnd[16 * i:16 * (i + 1)], version=4))
         job_meta = {
             "user": current_user.username,
             "priority": 0,
-            "created_at": datetime.utcnow().isoformat(),
-            "batch_id": str(uuid4())
+            "created_at": created_at,
+            "batch_id": batch_id
         }
-        
-        job = queue.enqueue(
-            process_video_job, 
-            str(url), 
-            job_id=job_id, 
-            job_timeout="1h",
+        job_datas.append(Queue.prepare_data(
+            process_video_job,
+            args=(str(url),),
+            job_id=job_id,
+            timeout="1h",
             meta=job_meta
-        )
-        
-        job_ids.append(job.id)
-        metrics.increment_job_metric("total_jobs")
-        
-        # Recent jobs listesine ekle
-        redis_conn.lpush("jobs:recent", job.id)
+        ))
+    
+    jobs = await asyncio.to_thread(_enqueue_indexed, job_datas, current_user.username)
+    job_ids = [job.id for job in jobs]
     
-    redis_conn.ltrim("jobs:recent", 0, 199)
+    metrics.increment_job_metric("total_jobs", count=len(job_ids))
     
     logger.info("Batch ingestion started", batch_size=len(job_ids), user=current_user.username)
     
     return {
-        "batch_id": str(uuid4()),
+        "batch_id": batch_id,
         "job_ids": job_ids,
         "message": f"Batch ingestion started for {len(job_ids)} videos"
     }
 
 # Job management endpoints
+def _job_result(job: Job):
+    """Bitmiş job'un sonucu (sync: sonuç Redis'ten okunur)"""
+    return job.result if job.get_status(refresh=False) == "finished" else None
+
+def _job_payload(job: Job) -> dict:
+    """Job durum payload'ı (job_status ve SSE stream)"""
+    return {
+        "job_id": job.id,
+        "status": job.get_status(refresh=False),
+        "enqueued_at": format_ts(job.enqueued_at),
+        "started_at": format_ts(job.started_at),
+        "ended_at": format_ts(job.ended_at),
+        "result": _job_result(job),
+    }
+
+def _cancel_and_record(job: Job) -> None:
+    """Job'u iptal et ve durum değişikliğini yayınla (sync, thread'de çalışır)"""
+    job.cancel()
+    # cancel() içindeki is_* kontrolleri yerel durumu eski değerle ezer; Redis'ten tekrar oku
+    job.get_status(refresh=True)
+    record_status_change(rq_conn, job)
+
 @app.get("/jobs/{job_id}")
 @limiter.limit("50/minute")
 async def job_status(
@@ -299,22 +365,16 @@ async def job_status(
 ):
     """Job durumu"""
     try:
-        job = Job.fetch(job_id, connection=redis_conn)
+        job = await asyncio.to_thread(Job.fetch, job_id, connection=rq_conn)
         
         # Sadece kendi joblarını görebilsin (admin hariç)
         job_meta = job.meta or {}
         if not current_user.is_admin and job_meta.get("user") != current_user.username:
             raise HTTPException(status_code=403, detail="Access denied to this job")
         
-        return {
-            "job_id": job.id,
-            "status": job.get_status(),
-            "enqueued_at": str(job.enqueued_at) if job.enqueued_at else None,
-            "started_at": str(job.started_at) if job.started_at else None,
-            "ended_at": str(job.ended_at) if job.ended_at else None,
-            "result": job.result if job.is_finished else None,
-            "meta": job.meta,
-        }
+        payload = await asyncio.to_thread(_job_payload, job)
+        payload["meta"] = job.meta
+        return payload
     except Exception as e:
         raise HTTPException(status_code=404, detail="Job not found")
 
@@ -327,34 +387,22 @@ async def jobs_list(
 ):
     """Job listesi"""
     # Admin tüm jobları, normal kullanıcı sadece kendi joblarını görür
-    if current_user.is_admin:
-        ids = redis_conn.lrange("jobs:recent", 0, max(0, limit - 1))
-    else:
-        # Sadece kendi joblarını filtrele (basit implementasyon)
-        ids = redis_conn.lrange("jobs:recent", 0, max(0, limit - 1))
+    key = ALL_JOBS_KEY if current_user.is_admin else user_jobs_key(current_user.username)
+    ids = await redis_conn.zrevrange(key, 0, max(0, limit - 1))
+    if not ids:
+        return {"items": []}
     
-    out = []
-    for b in ids:
-        jid = b.decode()
-        try:
-            job = Job.fetch(jid, connection=redis_conn)
-            job_meta = job.meta or {}
-            
-            # Sadece kendi joblarını göster
-            if current_user.is_admin or job_meta.get("user") == current_user.username:
-                out.append({
-                    "job_id": job.id,
-                    "status": job.get_status(),
-                    "enqueued_at": str(job.enqueued_at) if job.enqueued_at else None,
-                    "started_at": str(job.started_at) if job.started_at else None,
-                    "ended_at": str(job.ended_at) if job.ended_at else None,
-                    "user": job_meta.get("user", "unknown")
-                })
-        except Exception:
-            continue
+    # Job özetleri tek MGET ile okunur; RQ job hash'lerine dokunulmaz
+    summaries = await redis_conn.mget([summary_key(b.decode()) for b in ids])
+    out = [orjson.loads(raw) for raw in summaries if raw]
     
     return {"items": out}
 
+# SSE ping aralığı; durum değişikliği gelmezse bu aralıkla bağlantı kontrol edilir (saniye)
+SSE_PING_INTERVAL = 15
+# Bu durumlardan birine gelen job için stream kapatılır
+_TERMINAL_STATES = frozenset({"finished", "failed", "stopped", "canceled", "deferred"})
+
 @app.get("/jobs/{job_id}/stream")
 @limiter.limit("20/minute")
 async def job_stream(
@@ -363,40 +411,51 @@ async def job_stream(
     current_user: User = Depends(get_current_user)
 ):
     """Job stream (SSE)"""
-    async def event_gen() -> AsyncGenerator[bytes, None]:
+    async def event_gen() -> AsyncGenerator[dict, None]:
+        hub: JobStatusHub = request.app.state.job_status_hub
         last_status = None
+        # Önce abone ol, sonra oku: aradaki durum değişiklikleri kaçmaz
+        updates = await hub.subscribe(job_id)
         try:
+            job = await asyncio.to_thread(Job.fetch, job_id, connection=rq_conn)
+            
+            # Authorization check (job sahibi değişmez: bir kez yapılır)
+            job_meta = job.meta or {}
+            if not current_user.is_admin and job_meta.get("user") != current_user.username:
+                yield _sse_format({"error": "Access denied"})
+                return
+            
+            job_key = Job.key_for(job_id)
             while True:
-                job = Job.fetch(job_id, connection=redis_conn)
-                
-                # Authorization check
-                job_meta = job.meta or {}
-                if not current_user.is_admin and job_meta.get("user") != current_user.username:
-                    yield _sse_format({"error": "Access denied"}).encode()
-                    break
-                
-                status = job.get_status()
+                status = job.get_status(refresh=False)
                 if status != last_status:
-                    payload = {
-                        "job_id": job.id,
-                        "status": status,
-                        "enqueued_at": str(job.enqueued_at) if job.enqueued_at else None,
-                        "started_at": str(job.started_at) if job.started_at else None,
-                        "ended_at": str(job.ended_at) if job.ended_at else None,
-                        "result": job.result if job.is_finished else None,
-                    }
-                    yield _sse_format(payload).encode()
+                    yield _sse_format(await asyncio.to_thread(_job_payload, job))
                     last_status = status
                 
                 # End stream when finished/failed
-                if status in {"finished", "failed", "stopped", "deferred"}:
+                if status in _TERMINAL_STATES:
                     break
-                    
-                await asyncio.sleep(1)
+                
+                # Bir sonraki durum değişikliğini bekle: worker'ın publish ettiği durum ya da
+                # zaman aşımında tek alanlık HGET (kaçan publish'ler için). Job hash'i sadece
+                # durum gerçekten değiştiğinde tekrar okunur; client gittiyse abonelik bırakılır
+                while True:
+                    try:
+                        current = await asyncio.wait_for(updates.get(), SSE_PING_INTERVAL)
+                    except asyncio.TimeoutError:
+                        if await request.is_disconnected():
+                            return
+                        raw = await redis_conn.hget(job_key, "status")
+                        current = raw.decode() if raw else None
+                    if current != last_status:
+                        break
+                job = await asyncio.to_thread(Job.fetch, job_id, connection=rq_conn)
         except Exception as e:
-            yield _sse_format({"job_id": job_id, "status": "unknown", "error": str(e)}).encode()
+            yield _sse_format({"job_id": job_id, "status": "unknown", "error": str(e)})
+        finally:
+            await hub.unsubscribe(job_id, updates)
 
-    return StreamingResponse(event_gen(), media_type="text/event-stream")
+    return EventSourceResponse(event_gen(), ping=SSE_PING_INTERVAL)
 
 @app.post("/jobs/{job_id}/cancel")
 @limiter.limit("10/minute")
@@ -407,17 +466,17 @@ async def cancel_job(
 ):
     """Job iptal etme"""
     try:
-        job = Job.fetch(job_id, connection=redis_conn)
+        job = await asyncio.to_thread(Job.fetch, job_id, connection=rq_conn)
         
         # Authorization check
         job_meta = job.meta or {}
         if not current_user.is_admin and job_meta.get("user") != current_user.username:
             raise HTTPException(status_code=403, detail="Access denied to this job")
         
-        job.cancel()
+        await asyncio.to_thread(_cancel_and_record, job)
         logger.info("Job cancelled", job_id=job_id, user=current_user.username)
         
-        return {"ok": True, "status": job.get_status(), "message": "Job cancelled successfully"}
+        return {"ok": True, "status": job.get_status(refresh=False), "message": "Job cancelled successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Cancel failed: {e}")
 
@@ -427,7 +486,7 @@ async def cancel_job(
 @require_admin
 async def admin_get_settings(request: Request, current_user: User = Depends(get_current_user)):
     """Admin ayarları getir"""
-    return load_settings().model_dump()
+    return (await load_settings()).model_dump()
 
 @app.post("/admin/settings")
 @limiter.limit("10/minute")
@@ -438,7 +497,7 @@ async def admin_set_settings(
     current_user: User = Depends(get_current_user)
 ):
     """Admin ayarları güncelle"""
-    save_settings(payload)
+    await save_settings(payload)
     logger.info("Settings updated", user=current_user.username)
     return {"ok": True, "message": "Settings updated successfully"}
 
@@ -448,14 +507,15 @@ async def admin_set_settings(
 @require_admin
 async def integrations_ping(request: Request, current_user: User = Depends(get_current_user)):
     """Entegrasyon test"""
-    s = load_settings()
+    s = await load_settings()
     result = {"n8n": False, "telegram": False}
 
     # n8n ping
     if s.enable_n8n and s.n8n_webhook_url:
         try:
-            async with httpx.AsyncClient(timeout=5) as client:
-                r = await client.post(s.n8n_webhook_url, json={"type": "ping", "ts": datetime.utcnow().isoformat()})
+            r = await request.app.state.http.post(
+                s.n8n_webhook_url, json={"type": "ping", "ts": request.state.now_iso}, timeout=5
+            )
             result["n8n"] = r.status_code // 100 == 2
         except Exception:
             result["n8n"] = False
@@ -463,8 +523,9 @@ async def integrations_ping(request: Request, current_user: User = Depends(get_c
     # Telegram ping
     if s.enable_telegram and s.telegram_bot_token:
         try:
-            async with httpx.AsyncClient(timeout=5) as client:
-                r = await client.get(f"https://api.telegram.org/bot{s.telegram_bot_token}/getMe")
+            r = await request.app.state.http.get(
+                f"https://api.telegram.org/bot{s.telegram_bot_token}/getMe", timeout=5
+            )
             data = r.json()
             result["telegram"] = bool(data.get("ok"))
         except Exception:
@@ -481,12 +542,12 @@ async def trigger_n8n(
     current_user: User = Depends(get_current_user)
 ):
     """n8n webhook tetikle"""
-    s = load_settings()
+    s = await load_settings()
     if not (s.enable_n8n and s.n8n_webhook_url):
         raise HTTPException(status_code=400, detail="n8n not configured or disabled")
     
     try:
-        job = Job.fetch(job_id, connection=redis_conn)
+        job = await asyncio.to_thread(Job.fetch, job_id, connection=rq_conn)
         
         # Authorization check
         job_meta = job.meta or {}
@@ -497,16 +558,15 @@ async def trigger_n8n(
 
     payload = {
         "job_id": job.id,
-        "status": job.get_status(),
-        "result": job.result if job.is_finished else None,
+        "status": job.get_status(refresh=False),
+        "result": await asyncio.to_thread(_job_result, job),
         "meta": job.meta,
-        "ts": datetime.utcnow().isoformat(),
+        "ts": request.state.now_iso,
         "user": current_user.username
     }
     
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            r = await client.post(s.n8n_webhook_url, json=payload)
+        r = await request.app.state.http.post(s.n8n_webhook_url, json=payload)
         ok = r.status_code // 100 == 2
         
         logger.info("n8n trigger", job_id=job_id, user=current_user.username, success=ok)
@@ -528,14 +588,13 @@ async def notify_telegram(
     current_user: User = Depends(get_current_user)
 ):
     """Telegram bildirimi gönder"""
-    s = load_settings()
+    s = await load_settings()
     if not (s.enable_telegram and s.telegram_bot_token and s.telegram_chat_id):
         raise HTTPException(status_code=400, detail="Telegram not configured or disabled")
     
     url = f"https://api.telegram.org/bot{s.telegram_bot_token}/sendMessage"
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            r = await client.post(url, data={"chat_id": s.telegram_chat_id, "text": payload.message})
+        r = await request.app.state.http.post(url, data={"chat_id": s.telegram_chat_id, "text": payload.message})
         data = r.json()
         if not data.get("ok"):
             raise HTTPException(status_code=400, detail=f"Telegram error: {data}")
@@ -547,15 +606,36 @@ async def notify_telegram(
         raise HTTPException(status_code=500, detail=f"Telegram notification failed: {e}")
 
 # Utility functions
-def _sse_format(event: dict) -> str:
-    return f"data: {json.dumps(event)}\n\n"
+def _sse_format(event: dict) -> dict:
+    # Event adı verilmez: frontend varsayılan "message" event'ini dinliyor
+    return {"data": orjson.dumps(event).decode()}
 
 # Startup event
 @app.on_event("startup")
 async def startup_event():
+    # Entegrasyon çağrıları için ortak HTTP client (bağlantılar keep-alive ile tekrar kullanılır)
+    app.state.http = httpx.AsyncClient(
+        timeout=10,
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+    app.state.metrics_queue = asyncio.Queue(maxsize=METRICS_QUEUE_MAXSIZE)
+    app.state.metrics_task = asyncio.create_task(_drain_metrics(app.state.metrics_queue))
+    # SSE stream'leri için süreç başına tek PubSub bağlantısı
+    app.state.job_status_hub = JobStatusHub(redis_conn)
     logger.info("Agent Ingest API v2.0.0 started", version="2.0.0", environment=settings.ENV)
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
+    app.state.metrics_task.cancel()
+    # Kuyrukta kalan kayıtları kaybetme
+    pending = []
+    while not app.state.metrics_queue.empty():
+        pending.append(app.state.metrics_queue.get_nowait())
+    metrics.bulk_record(pending)
+    await app.state.http.aclose()
+    await aclose_health_clients()
+    await app.state.job_status_hub.aclose()
+    await redis_conn.connection_pool.disconnect()
     logger.info("Agent Ingest API shutting down", version="2.0.0")
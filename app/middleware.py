@@ -9,11 +9,12 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
 import re
+from itertools import chain
 from typing import Callable
 from .settings import settings
 
-# Rate limiter instance
-limiter = Limiter(key_func=get_remote_address)
+# Rate limiter instance (storage: settings.RATE_LIMIT_STORAGE_URI)
+limiter = Limiter(key_func=get_remote_address, storage_uri=settings.RATE_LIMIT_STORAGE_URI)
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     """Güvenlik başlıkları middleware'i"""
@@ -34,6 +35,9 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
 class InputSanitizationMiddleware(BaseHTTPMiddleware):
     """Input sanitization middleware'i"""
     
+    # Yanıt gövdesi dönmeyen metodlar taranmaz
+    SKIP_METHODS = frozenset({"OPTIONS", "HEAD"})
+    
     def __init__(self, app, patterns=None):
         super().__init__(app)
         self.patterns = patterns or [
@@ -41,11 +45,20 @@ class InputSanitizationMiddleware(BaseHTTPMiddleware):
             r'javascript:',
             r'on\w+\s*=',  # Event handlers
         ]
-        self.compiled_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in self.patterns]
+        # Tüm pattern'ler tek alternation regex'inde: girdi bir kez taranır
+        self.compiled_pattern = re.compile(
+            "|".join(f"(?:{pattern})" for pattern in self.patterns),
+            re.IGNORECASE | re.DOTALL,
+        )
     
     async def dispatch(self, request: Request, call_next: Callable):
+        # Kontrol edilecek girdi yoksa doğrudan devam et (URL nesnesi oluşturmadan)
+        if (request.method in self.SKIP_METHODS
+                or (not request.path_params and not request.scope.get("query_string"))):
+            return await call_next(request)
+        
         # Path ve query parameters'ları kontrol et
-        for param in list(request.path_params.values()) + list(request.query_params.values()):
+        for param in chain(request.path_params.values(), request.query_params.values()):
             if isinstance(param, str) and self._contains_malicious_pattern(param):
                 raise HTTPException(status_code=400, detail="Malicious input detected")
         
@@ -53,10 +66,7 @@ class InputSanitizationMiddleware(BaseHTTPMiddleware):
         return response
     
     def _contains_malicious_pattern(self, text: str) -> bool:
-        for pattern in self.compiled_patterns:
-            if pattern.search(text):
-                return True
-        return False
+        return self.compiled_pattern.search(text) is not None
 
 # IP rate limiting decorator'ları
 def get_client_ip(request: Request) -> str:
@@ -1,10 +1,10 @@
-import json
-import shutil
 import subprocess
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+import orjson
+
 from .settings import settings
 
 
@@ -25,7 +25,7 @@ def process_video_job(url: str) -> dict[str, Any]:
     job_dir = settings.DATA_DIR / ts
     job_dir.mkdir(parents=True, exist_ok=True)
 
-    # 1) Download audio
+    # 1) Download audio (straight to a known name: audio.m4a after extraction)
     audio_path = job_dir / "audio.m4a"
     # yt-dlp needs ffmpeg installed in PATH
     run([
@@ -36,15 +36,12 @@ def process_video_job(url: str) -> dict[str, Any]:
         "--audio-format",
         "m4a",
         "-o",
-        str(job_dir / "%(_id)s.%(ext)s"),
+        str(job_dir / "audio.%(ext)s"),
         url,
     ])
 
-    # Move best audio file to a known name
-    candidates = list(job_dir.glob("*.m4a")) + list(job_dir.glob("*.mp3"))
-    if not candidates:
+    if not audio_path.exists():
         raise RuntimeError("No audio file downloaded. Ensure you have rights and ffmpeg is installed.")
-    shutil.move(str(candidates[0]), audio_path)
 
     # 2) Minimal manifest
     manifest = {
@@ -59,7 +56,6 @@ def process_video_job(url: str) -> dict[str, Any]:
         "notes": "WARNING: Process only owned/licensed/CC content. Respect YouTube ToS.",
     }
 
-    with open(job_dir / "manifest.json", "w", encoding="utf-8") as f:
-        json.dump(manifest, f, indent=2)
+    (job_dir / "manifest.json").write_bytes(orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
 
     return {"job_dir": str(job_dir), "manifest": manifest}
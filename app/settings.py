@@ -1,5 +1,8 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from redis import BlockingConnectionPool
+from redis.asyncio import BlockingConnectionPool as AsyncBlockingConnectionPool
 
 class Settings(BaseSettings):
     # Core
@@ -10,10 +13,19 @@ class Settings(BaseSettings):
     # Redis / RQ
     REDIS_URL: str = "redis://localhost:6379/0"
     RQ_QUEUE: str = "default"
+    # Süreç başına, havuz başına Redis bağlantı üst sınırı (SSE stream'leri tek PubSub bağlantısını paylaşır)
+    REDIS_MAX_CONNECTIONS: int = 200
+
+    # Rate limiting ("memory://": süreç içi sayaç, Redis RTT yok;
+    # worker'lar arası ortak limit gerekiyorsa "redis://..." verilir)
+    RATE_LIMIT_STORAGE_URI: str = "memory://"
 
     # Safety flags
     REQUIRE_RIGHTS_CONFIRM: bool = True
 
+    # Auth (None: ENV=test ise 4, aksi halde 12)
+    BCRYPT_ROUNDS: int | None = None
+
     # Qdrant
     QDRANT_URL: str = "http://localhost:6333"
     QDRANT_API_KEY: str | None = None
@@ -22,3 +34,30 @@ class Settings(BaseSettings):
 
 settings = Settings()
 settings.DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def _redis_pool_kwargs() -> dict:
+    """Sync ve async bağlantı havuzlarının ortak ayarları"""
+    kwargs = {
+        "max_connections": settings.REDIS_MAX_CONNECTIONS,
+        "timeout": 5,
+        "health_check_interval": 30,
+    }
+    # Keepalive sadece TCP bağlantılarında geçerli
+    if not settings.REDIS_URL.startswith("unix://"):
+        kwargs["socket_keepalive"] = True
+    return kwargs
+
+@lru_cache(maxsize=None)
+def get_redis_pool() -> BlockingConnectionPool:
+    """Süreç içindeki sync Redis client'larının (RQ) paylaştığı bağlantı havuzu
+
+    Havuz doluysa yeni bağlantı açmak yerine en fazla 5 saniye beklenir.
+    Redis aynı makinedeyse REDIS_URL=unix:///path/redis.sock ile TCP atlanır.
+    """
+    return BlockingConnectionPool.from_url(settings.REDIS_URL, **_redis_pool_kwargs())
+
+@lru_cache(maxsize=None)
+def get_async_redis_pool() -> AsyncBlockingConnectionPool:
+    """Async handler'ların kullandığı redis.asyncio bağlantı havuzu (ayarlar sync havuzla aynı)"""
+    return AsyncBlockingConnectionPool.from_url(settings.REDIS_URL, **_redis_pool_kwargs())
@@ -1,11 +1,32 @@
 from rq import Worker, Queue, Connection
 from redis import Redis
-from app.settings import settings
+from app.jobs import record_status_change, summary_ttl
+from app.settings import get_redis_pool, settings
 
 listen = [settings.RQ_QUEUE]
-redis_conn = Redis.from_url(settings.REDIS_URL)
+redis_conn = Redis(connection_pool=get_redis_pool())
+
+
+class IndexedWorker(Worker):
+    """Durum değişikliklerini job özetlerine yazan ve status kanalına publish eden worker"""
+
+    def prepare_job_execution(self, job, *args, **kwargs):
+        super().prepare_job_execution(job, *args, **kwargs)
+        record_status_change(self.connection, job)
+
+    # Bitmiş/başarısız job'ların özeti, RQ'nun hash'e koyduğu result_ttl/failure_ttl
+    # süresiyle birlikte düşer: /jobs, silinmiş job'ları listelemez
+
+    def handle_job_success(self, job, *args, **kwargs):
+        super().handle_job_success(job, *args, **kwargs)
+        record_status_change(self.connection, job, summary_ttl(self.connection, job))
+
+    def handle_job_failure(self, job, *args, **kwargs):
+        super().handle_job_failure(job, *args, **kwargs)
+        record_status_change(self.connection, job, summary_ttl(self.connection, job))
+
 
 if __name__ == '__main__':
     with Connection(redis_conn):
-        worker = Worker([Queue(q, connection=redis_conn) for q in listen])
+        worker = IndexedWorker([Queue(q, connection=redis_conn) for q in listen])
         worker.work()